@@ -3,6 +3,7 @@ Generate the tables used for tracking stock servers and validators.
 '''
 import logging
 from copy import deepcopy
+from dataclasses import dataclass, fields
 
 def create_table_stock(settings):
     '''
@@ -56,50 +57,75 @@ def create_table_stock(settings):
     logging.warning(f"Initial server list created with {len(table)} items.")
     return table
 
+@dataclass(slots=True)
+class ValidatorRow:
+    '''
+    Information on a validator being tracked.
+
+    Hot paths should use attribute access. The dictionary style methods let rows be handled
+    alongside the stock server table (a list of dicts), for example when checking for forks
+    and sending notifications.
+    '''
+    cookie: str | None = None
+    server_version: str | None = None
+    amendments: list | None = None
+    flags: int | None = None
+    base_fee: int | None = None
+    reserve_base: int | None = None
+    reserve_inc: int | None = None
+    full: bool | None = None
+    ledger_hash: str | None = None
+    validated_hash: str | None = None
+    ledger_index: str | None = None
+    signature: str | None = None
+    signing_time: int | None = None
+    load_fee: int | None = None
+    forked: bool | None = None
+    time_forked: float | None = None
+    time_updated: str | None = None
+    server_name: str | None = None
+    notifications: dict | None = None
+    master_key: str | None = None
+    validation_public_key: str | None = None
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in VALIDATOR_FIELDS
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def keys(self):
+        return VALIDATOR_FIELDS
+
+# Names of the values tracked for each validator
+VALIDATOR_FIELDS = frozenset(field.name for field in fields(ValidatorRow))
+
 def create_table_validation(settings):
     '''
-    Create a dictionary with information on validators identified
+    Create a row with information on each validator identified
     in the settings.
     ### In the future, this should not be created from settings. ###
 
     :param settings: Configuration file
-    :param list val_keys: List of validation keys to monitor
 
     :rtype: list
     '''
     table = []
 
-    default_dict = {
-        'cookie': None,
-        'server_version': None,
-        'amendments': None,
-        'flags': None,
-        'base_fee': None,
-        'reserve_base': None,
-        'reserve_inc': None,
-        'full': None,
-        'ledger_hash': None,
-        'validated_hash': None,
-        'ledger_index': None,
-        'signature': None,
-        'signing_time': None,
-        'load_fee': None,
-        'forked': None,
-        'time_forked': None,
-        'time_updated': None,
-        'server_name': None,
-        'notifications': None,
-        'master_key': None,
-        'validation_public_key': None,
-    }
-
-    logging.debug("Preparing to build validator dictionaries.")
+    logging.debug("Preparing to build validator rows.")
     for validator in settings.VALIDATORS:
-        val_dict = deepcopy(default_dict)
-        for key in val_dict:
-            if key in validator:
-                val_dict[key] = validator.get(key)
-        table.append(val_dict)
+        table.append(
+            ValidatorRow(**{key: value for key, value in validator.items() if key in VALIDATOR_FIELDS})
+        )
     logging.warning(f"Successfully created initial validator list with: {len(table)} items.")
 
     return table
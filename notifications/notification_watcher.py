@@ -44,7 +44,8 @@ async def notifications(args_d):
     dispatched via all enabled notification channels.
 
     Items placed into notification_queue should be a dict with "'server': {'notifications':{}}" &
-    'message' keys.
+    'message' keys. To send the same message to several recipients with one queue entry, use a
+    'servers' key with a list of recipients instead of 'server'.
 
     :param dict args_d: Default settings and queues.
     '''
@@ -52,7 +53,13 @@ async def notifications(args_d):
     while True:
         try:
             notification = args_d['notification_queue'].get()
-            await dispatch_notification(args_d['settings'], notification)
+            if 'servers' in notification:
+                for server in notification['servers']:
+                    await dispatch_notification(
+                        args_d['settings'], {'message': notification['message'], 'server': server}
+                    )
+            else:
+                await dispatch_notification(args_d['settings'], notification)
 
         except (asyncio.CancelledError, KeyboardInterrupt):
             logging.critical("Keyboard interrupt detected. Stopping notification watcher.")
@@ -2,8 +2,13 @@
 Functions used across response processor.
 '''
 import logging
+import time
 import asyncio
-from copy import deepcopy
+import threading
+from collections import deque
+
+# The formatted time only changes once per second, so reuse it between messages
+TIME_UPDATED_CACHE = {'second': None, 'formatted': None}
 
 
 async def copy_stock(table_stock):
@@ -11,15 +16,93 @@ async def copy_stock(table_stock):
     Copy a list of dictionaries describing the stock servers being tracked while
     excluding websocket connection objects.
 
+    Values aren't deep copied, as callers only replace top level values in the copies.
+
     :param list table_stock: Stock servers being monitored
     '''
-    table_stock_new = []
+    return [
+        {key: value for key, value in server.items() if key != 'ws_connection_task'}
+        for server in table_stock
+    ]
+
+def get_time_updated(now):
+    '''
+    Format a timestamp as local time for 'time_updated' table values.
+
+    :param float now: Seconds since the epoch
+    :rtype: str
+    '''
+    now = int(now)
+    if now != TIME_UPDATED_CACHE['second']:
+        TIME_UPDATED_CACHE['second'] = now
+        TIME_UPDATED_CACHE['formatted'] = time.strftime("%y-%m-%d %H:%M:%S", time.localtime(now))
+    return TIME_UPDATED_CACHE['formatted']
+
+class FastQueue:
+    '''
+    Buffer messages from a multiprocessing queue in a deque, so the event loop isn't blocked
+    while waiting for new messages. A daemon thread moves messages into the deque and wakes the
+    consumer with an asyncio.Event.
 
-    for server in table_stock:
-        table_stock_new.append(
-            {x: deepcopy(server[x]) for x in server if x != 'ws_connection_task'}
-        )
-    return table_stock_new
+    Must be created from within the running event loop that will consume the messages.
+
+    :param multiprocessing.Queue source: Queue filled by another process
+    '''
+    def __init__(self, source):
+        self.source = source
+        self.messages = deque()
+        self.event = asyncio.Event()
+        self.loop = asyncio.get_running_loop()
+        threading.Thread(target=self.feed, daemon=True).start()
+
+    def feed(self):
+        '''
+        Move messages from the source queue into the deque (runs in its own thread).
+        '''
+        while True:
+            try:
+                self.put_nowait(self.source.get())
+            except (EOFError, OSError) as error:
+                logging.critical(f"Unable to read from the message queue: '{error}'. Stopping the queue feeder.")
+                break
+            except Exception as error:
+                logging.critical(f"Otherwise uncaught exception in the queue feeder: '{error}'.")
+
+    def put_nowait(self, message):
+        '''
+        Add a message, waking the consumer only if it might be waiting.
+
+        :param dict message: Incoming subscription response
+        '''
+        self.messages.append(message)
+        if not self.event.is_set():
+            self.loop.call_soon_threadsafe(self.event.set)
+
+    async def get(self):
+        '''
+        Wait for the next message.
+
+        :rtype: dict
+        '''
+        while not self.messages:
+            self.event.clear()
+            # Check again in case a message arrived before the event was cleared
+            if self.messages:
+                break
+            await self.event.wait()
+        return self.messages.popleft()
+
+    def getmany(self, max_messages):
+        '''
+        Take up to max_messages messages that are already buffered, without waiting.
+
+        :param int max_messages: Maximum number of messages to return
+        :rtype: list
+        '''
+        messages = []
+        while self.messages and len(messages) < max_messages:
+            messages.append(self.messages.popleft())
+        return messages
 '''
 Convert a version integer returned by servers on the XRP Ledger
 into a human readable version number.
@@ -27,7 +110,7 @@ into a human readable version number.
 This is basically a Python3 translation of the XRPScan XRPL-Server-Version
 repo: https://github.com/xrpscan/xrpl-server-version/blob/main/index.js
 '''
-async def decode_version(version):
+def decode_version(version):
     '''
     Decode XRP Ledger version numbers.
 
@@ -12,51 +12,70 @@ from prettytable import PrettyTable, ALL
 from .common import decode_version
 from .common import copy_stock
 
+# Decoded server versions. Only a handful of versions are seen on the network at once.
+VERSION_CACHE = {}
+
 
 # Validator table output
-async def format_table_validation(table):
+def shorten(value):
+    '''
+    Shorten keys and hashes for display.
+
+    :param value: Key, hash, or None
+    '''
+    if isinstance(value, str):
+        return value[:5]
+    return value
+
+def format_table_validation(table):
     '''
     Format output for the validation table, so it's human friendly.
+    The table itself isn't modified; a row of display values is yielded for each validator.
 
-    :param list table: Dictionaries for each validator being tracked.
+    :param list table: Rows for each validator being tracked.
     '''
     color_reset = "\033[0;0m"
     green = "\033[0;32m"
     red = "\033[1;31m"
     for validator in table:
-        # Shorten keys and hashes
-        if isinstance(validator['master_key'], str):
-            validator['master_key'] = validator['master_key'][:5]
-        if isinstance(validator['validation_public_key'], str):
-            validator['validation_public_key'] = validator['validation_public_key'][:5]
-        if isinstance(validator['ledger_hash'], str):
-            validator['ledger_hash'] = validator['ledger_hash'][:5]
-        if isinstance(validator['validated_hash'], str):
-            validator['validated_hash'] = validator['validated_hash'][:5]
+        server_name = validator.server_name
         # Green if not forked
-        if validator['forked'] is False:
-            validator['forked'] = green + str(validator['forked']) + color_reset
+        if validator.forked is False:
+            forked = f"{green}{validator.forked}{color_reset}"
         else:
-            validator['forked'] = red + str(validator['forked']) + color_reset
-            validator['server_name'] = red + validator['server_name'] + color_reset
+            forked = f"{red}{validator.forked}{color_reset}"
+            server_name = f"{red}{validator.server_name}{color_reset}"
         # Green if validations are full
-        if validator['full']:
-            validator['full'] = green + str(validator['full']) + color_reset
+        if validator.full:
+            full = f"{green}{validator.full}{color_reset}"
         else:
-            validator['full'] = red + str(validator['full']) + color_reset
-            validator['server_name'] = red + validator['server_name'] + color_reset
+            full = f"{red}{validator.full}{color_reset}"
+            server_name = f"{red}{validator.server_name}{color_reset}"
         # Calculate server version
-        if isinstance(validator['server_version'], str):
-            if validator['server_version'][0:].isdigit():
-                server_version = await decode_version(validator['server_version'])
-                validator['server_version'] = server_version.get('version')
-    return table
+        server_version = validator.server_version
+        if isinstance(server_version, str) and server_version.isdigit():
+            if server_version not in VERSION_CACHE:
+                VERSION_CACHE[server_version] = decode_version(server_version).get('version')
+            server_version = VERSION_CACHE[server_version]
+        yield [
+            server_name,
+            shorten(validator.master_key),
+            shorten(validator.validation_public_key),
+            server_version,
+            validator.base_fee,
+            validator.load_fee,
+            shorten(validator.ledger_hash),
+            validator.ledger_index,
+            full,
+            forked,
+            validator.time_updated,
+        ]
 
 async def print_table_validation(table):
     '''
     Print the validation table.
 
-    :param list table: Dictionaries for each validator being tracked.
+    :param list table: Rows for each validator being tracked.
     '''
     logging.info("Preparing to print updated validations table.")
     pretty_table = PrettyTable()
@@ -65,22 +84,8 @@ async def print_table_validation(table):
         "LL Hash", "LL Index", "Full?", "Forked?", "Last Updated",
     ]
 
-    table_new = await format_table_validation(deepcopy(table))
-
-    for validator in table_new:
-        pretty_table.add_row([
-            validator['server_name'],
-            validator['master_key'],
-            validator['validation_public_key'],
-            validator['server_version'],
-            validator['base_fee'],
-            validator['load_fee'],
-            validator['ledger_hash'],
-            validator['ledger_index'],
-            validator['full'],
-            validator['forked'],
-            validator['time_updated'],
-        ])
+    for row in format_table_validation(table):
+        pretty_table.add_row(row)
 
     pretty_table.sortby = "Validator Name"
     print(pretty_table)
@@ -190,9 +195,9 @@ async def sort_amendments(table_validator, amendments):
     for amendment in amendments:
         amendment['supporters'] = []
         for validator in table_validator:
-            if isinstance(validator['amendments'], list):
-                if amendment['id'] in validator['amendments']:
-                    amendment['supporters'].append(validator['server_name'])
+            if isinstance(validator.amendments, list):
+                if amendment['id'] in validator.amendments:
+                    amendment['supporters'].append(validator.server_name)
 
     return amendments
 
@@ -1,12 +1,12 @@
 '''
 Process messages from the asyncio queue.
 '''
-import os
 import logging
 import time
 import asyncio
 
 from . import console_output
+from .common import FastQueue
 from .check_forked import fork_checker
 from . import process_stock_output
 from . import process_validation_output
@@ -23,106 +23,168 @@ class ResponseProcessor:
         self.table_validator = args_d['table_validator']
         self.forks = []
         self.ll_modes = []
-        self.val_keys = []
-        self.processed_validations = []
+        self.val_keys = set()
+        self.val_index = ({}, {})
+        self.processed_validations = process_validation_output.SignatureWindow(self.settings.PROCESSED_VAL_MAX)
         self.message_queue = args_d['message_queue']
+        self.message_buffer = None
         self.notification_queue = args_d['notification_queue']
-        self.time_last_output = 0
-        self.time_fork_check = 0
-        self.last_heartbeat = time.time()
+        self.message_count = 0
+        self.tables_changed = True
+        self.message_handlers = {
+            'serverStatus': self.handle_server_message,
+            'ledgerClosed': self.handle_ledger_message,
+            'validationReceived': self.handle_validation_message,
+        }
 
 
-    async def process_console_output(self):
+    async def run_periodically(self, function, interval, run_first=True):
         '''
-        Call functions to print messages to the console, depending on settings.
+        Call a method every interval seconds in its own task, so slow periodic work
+        doesn't hold up message processing.
+
+        Tables are only changed between awaits that don't suspend, so periodic tasks and
+        message handlers never see each other's partial updates.
 
-        :param settings: Config file
+        :param function: Coroutine method to call
+        :param int interval: Seconds to wait between calls
+        :param bool run_first: Call the method once at startup, before the first wait
+        '''
+        delay = 0 if run_first else interval
+        while True:
+            try:
+                await asyncio.sleep(delay)
+                delay = interval
+                await function()
+            except (asyncio.CancelledError, KeyboardInterrupt):
+                logging.critical(f"Keyboard interrupt detected. Stopped periodic task: '{function.__name__}'.")
+                break
+            except Exception as error:
+                logging.critical(f"Otherwise uncaught exception in periodic task: '{function.__name__}': '{error}'.")
+
+    async def process_console_output(self):
+        '''
+        Call functions to print messages to the console if anything changed since the last output.
         '''
-        if self.settings.CONSOLE_OUT is True \
-           and time.time() - self.time_last_output >= self.settings.CONSOLE_REFRESH_TIME:
-            os.system('clear')
+        if self.tables_changed:
+            # Move the cursor home and clear the screen, same as 'clear' without forking a shell
+            print("\x1b[H\x1b[2J", end="", flush=True)
             await console_output.print_table_server(self.table_stock)
             if self.table_validator:
                 await console_output.print_table_validation(self.table_validator)
                 if self.settings.PRINT_AMENDMENTS:
                     await console_output.print_table_amendments(self.table_validator, self.settings.AMENDMENTS)
-            self.time_last_output = time.time()
+            self.tables_changed = False
 
     async def evaluate_forks(self):
         '''
         Call functions to check for forked servers.
         '''
-        if time.time() - self.time_fork_check > self.settings.FORK_CHECK_FREQ:
-            self.ll_modes, self.table_stock, self.table_validator = await fork_checker(self.settings, self.table_stock, self.table_validator, self.notification_queue)
-            self.time_fork_check = time.time()
+        self.ll_modes, self.table_stock, self.table_validator = await fork_checker(self.settings, self.table_stock, self.table_validator, self.notification_queue)
+        self.tables_changed = True
+
+    async def handle_server_message(self, message, now):
+        '''
+        Update the stock server table from a server subscription message.
+
+        :param dict message: Incoming subscription response
+        :param float now: Time the message batch was received
+        '''
+        self.table_stock = \
+                await process_stock_output.update_table_server(
+                    self.table_stock, self.notification_queue, message, now
+                )
+        self.tables_changed = True
+
+    async def handle_ledger_message(self, message, now):
+        '''
+        Update the stock server table from a ledger subscription message.
+
+        :param dict message: Incoming subscription response
+        :param float now: Time the message batch was received
+        '''
+        self.table_stock = \
+                await process_stock_output.update_table_ledger(
+                    self.table_stock, message, now
+                )
+        self.tables_changed = True
+
+    async def handle_validation_message(self, message, now):
+        '''
+        Update the validator table from a validation subscription message.
 
-    async def sort_new_messages(self, message):
+        :param dict message: Incoming subscription response
+        :param float now: Time the message batch was received
+        '''
+        self.val_keys, self.table_validator, self.processed_validations, updated = \
+                await process_validation_output.check_validations(
+                    self.settings,
+                    self.val_keys,
+                    self.table_validator,
+                    self.val_index,
+                    self.processed_validations,
+                    message,
+                    now,
+        )
+        if updated:
+            self.tables_changed = True
+
+    async def sort_new_messages(self, message, now):
         '''
         Check if incoming messages are server, ledger, or validation subscription messages.
 
         :param dict message: Incoming subscription response
+        :param float now: Time the message batch was received
         '''
-        # Check for server subscription messages
-        if message['data'].get('type') == 'serverStatus' or message['data'].get('result'):
-            self.table_stock = \
-                    await process_stock_output.update_table_server(
-                        self.table_stock, self.notification_queue, message
-                    )
-
-        # Check for ledger subscription messages
-        elif message['data'].get('type') == 'ledgerClosed':
-            self.table_stock = \
-                    await process_stock_output.update_table_ledger(
-                        self.table_stock, message
-                    )
-
-        # Check for validation messages
-        elif message['data'].get('type') == 'validationReceived':
-            self.val_keys, self.table_validator, self.processed_validations = \
-                    await process_validation_output.check_validations(
-                        self.settings,
-                        self.val_keys,
-                        self.table_validator,
-                        self.processed_validations,
-                        message
-            )
+        handler = self.message_handlers.get(message['data'].get('type'))
+        # Responses to the subscribe command are server messages
+        if not handler and message['data'].get('result'):
+            handler = self.handle_server_message
 
+        if handler:
+            await handler(message, now)
         else:
             logging.warning(f"Message received that couldn't be sorted: '{message}'.")
 
     async def generate_val_keys(self):
         '''
-        Create a list of all potential keys for validators we are monitoring.
+        Create a set of all potential keys for validators we are monitoring.
+        If set, remove duplicate validators from the table first.
         '''
-        val_keys = list(i.get('master_key') for i in self.table_validator) \
-                + list(i.get('validation_public_key') for i in self.table_validator)
-
-        for i in val_keys:
-            if i:
-                self.val_keys.append(i)
-        logging.warning(f"Created initial validation key tracking list with: '{len(self.val_keys)}' items.")
+        self.val_keys, self.table_validator = process_validation_output.clean_validations(
+            self.settings, self.table_validator, self.val_index
+        )
+        logging.warning(f"Created validation key tracking set with: '{len(self.val_keys)}' items.")
 
     async def heartbeat_message(self):
         '''
-        Send an SMS message periodically.
-        '''
-        if self.settings.ADMIN_HEARTBEAT \
-           and time.time() - self.last_heartbeat >= self.settings.HEARTBEAT_INTERVAL:
-            now = time.strftime("%m-%d %H:%M:%S", time.gmtime())
-            message = "XRPL Livenet Monitor bot heartbeat. "
-            message = message + str(f"LL mode: {self.ll_modes[0]}. ")
-            message = message + str(f"Server time (UTC): {now}.")
-            logging.info(message)
-
-            for admin in self.settings.ADMIN_NOTIFICATIONS:
-                self.notification_queue.put(
-                    {
-                        'message': message,
-                        'server': admin,
-                    }
-                )
+        Send an SMS message to administrators.
+        '''
+        now = time.strftime("%m-%d %H:%M:%S", time.gmtime())
+        message = "XRPL Livenet Monitor bot heartbeat. "
+        ll_mode = self.ll_modes[0] if self.ll_modes else "unknown"
+        message = message + str(f"LL mode: {ll_mode}. ")
+        message = message + str(f"Server time (UTC): {now}.")
+        logging.info(message)
+
+        # One queue entry for all admins, the notification watcher sends it to each of them
+        self.notification_queue.put(
+            {
+                'message': message,
+                'servers': list(self.settings.ADMIN_NOTIFICATIONS),
+            }
+        )
+
+    async def get_messages(self):
+        '''
+        Wait for a message, then take any others that are already waiting in the queue
+        (up to MAX_MSG_BATCH), so per batch work is done once rather than once per message.
 
-            self.last_heartbeat = time.time()
+        :rtype: list
+        '''
+        messages = [await self.message_buffer.get()]
+        messages.extend(self.message_buffer.getmany(self.settings.MAX_MSG_BATCH - 1))
+        return messages
 
     async def process_messages(self):
         '''
@@ -130,16 +192,25 @@ class ResponseProcessor:
 
         '''
         await self.generate_val_keys()
+        self.message_buffer = FastQueue(self.message_queue)
 
         while True:
             try:
-                message = self.message_queue.get()
-                await self.sort_new_messages(message)
-                await self.evaluate_forks()
-                await self.process_console_output()
-                await self.heartbeat_message()
-            except KeyError as error :
-                logging.warning(f"Error: '{error}'. Received an unexpected message: '{message}'.")
+                messages = await self.get_messages()
+                now = time.time()
+                for message in messages:
+                    try:
+                        await self.sort_new_messages(message, now)
+                    except KeyError as error :
+                        logging.warning(f"Error: '{error}'. Received an unexpected message: '{message}'.")
+                    except Exception as error:
+                        # Skip only the bad message, not the rest of the batch
+                        logging.critical(f"Otherwise uncaught exception processing message: '{message}'. Error: '{error}'.")
+                    # Message processing doesn't wait on I/O, so hand control back to the event
+                    # loop now and then to keep other tasks from starving during message bursts.
+                    self.message_count += 1
+                    if self.message_count % self.settings.YIELD_EVERY == 0:
+                        await asyncio.sleep(0)
             except (asyncio.CancelledError, KeyboardInterrupt):
                 logging.critical("Keyboard interrupt detected. Response processor stopped.")
                 break
@@ -152,13 +223,26 @@ def start_output_processing(args_d):
 
     :param dict args_d: Default settings, queues, and tables.
     '''
+    settings = args_d['settings']
     loop = asyncio.new_event_loop()
     monitor_tasks = []
 
     try:
+        processor = ResponseProcessor(args_d)
+        monitor_tasks.append(
+            loop.create_task(processor.process_messages())
+        )
         monitor_tasks.append(
-            loop.create_task(ResponseProcessor(args_d).process_messages())
+            loop.create_task(processor.run_periodically(processor.evaluate_forks, settings.FORK_CHECK_FREQ))
         )
+        if settings.CONSOLE_OUT is True:
+            monitor_tasks.append(
+                loop.create_task(processor.run_periodically(processor.process_console_output, settings.CONSOLE_REFRESH_TIME))
+            )
+        if settings.ADMIN_HEARTBEAT:
+            monitor_tasks.append(
+                loop.create_task(processor.run_periodically(processor.heartbeat_message, settings.HEARTBEAT_INTERVAL, run_first=False))
+            )
 
         logging.warning("Response processor loop started.")
         loop.run_forever()
@@ -6,13 +6,16 @@ import logging
 import time
 import asyncio
 
+from .common import get_time_updated
 
-async def update_table_ledger(table, message):
+
+async def update_table_ledger(table, message, now):
     '''
     Add information from ledger closed messages into the table.
 
     :param list table: Dictionary for each server being tracked
     :param dict message: Incoming ledger close message
+    :param float now: Time the message was received
 
     :rtype: list
     '''
@@ -22,8 +25,8 @@ async def update_table_ledger(table, message):
             for key in server.keys():
                 if key in message['data'].keys():
                     server[key] = message['data'][key]
-            server['time_updated'] = time.strftime("%y-%m-%d %H:%M:%S", time.gmtime())
-            logging.info(f"Successfully updated the table with ledger closed message from: '{server['url']}'.")
+            server['time_updated'] = time.strftime("%y-%m-%d %H:%M:%S", time.gmtime(now))
+            logging.info("Successfully updated the table with ledger closed message from: '%s'.", server['url'])
 
     return table
 
@@ -53,7 +56,7 @@ async def check_state_change(server, message, notification_queue):
             }
         )
 
-async def update_table_server(table, notification_queue, message):
+async def update_table_server(table, notification_queue, message, now):
     '''
     Add info contained in new messages to the table.
 
@@ -61,8 +64,9 @@ async def update_table_server(table, notification_queue, message):
     :param list table: Dictionary for each server being tracked
     :param asyncio.queues.Queue notification_queue: Message queue to send via SMS
     :param dict message: New server subscription message
+    :param float now: Time the message was received
     '''
-    logging.info(f"Server status message received '{message}'. Preparing to update the table.")
+    logging.info("Server status message received '%s'. Preparing to update the table.", message)
     if message['data'].get('result'):
         message_result = message['data']['result']
     elif message['data'].get('type') == 'serverStatus':
@@ -74,7 +78,7 @@ async def update_table_server(table, notification_queue, message):
             for key in message_result.keys():
                 if key in server.keys():
                     server[key] = message_result[key]
-            server['time_updated'] = time.strftime("%y-%m-%d %H:%M:%S", time.localtime())
+            server['time_updated'] = get_time_updated(now)
 
             logging.info("Successfully updated the server status table.")
 
@@ -2,25 +2,57 @@
 Process validation stream messages.
 '''
 import logging
-import time
-import asyncio
-from copy import deepcopy
+from collections import deque
 
+from misc.generate_tables import VALIDATOR_FIELDS
+from .common import get_time_updated
 
-async def del_dup_validators(table):
+class SignatureWindow:
     '''
-    Remove duplicate entries from the val_keys list.
+    Remember the most recent validation signatures so duplicate messages can be skipped.
+    Lookups use a set, while a deque tracks arrival order so the oldest signatures are evicted first.
 
-    :param list table: Dictionaries for each validator being tracked
+    :param int max_size: Maximum number of signatures to remember
+    '''
+    def __init__(self, max_size):
+        self.signatures = set()
+        self.order = deque(maxlen=max_size)
+
+    def __contains__(self, signature):
+        return signature in self.signatures
+
+    def __len__(self):
+        return len(self.order)
+
+    def add(self, signature):
+        '''
+        Remember a signature, forgetting the oldest one if the window is full.
+
+        :param str signature: Validation message signature
+        '''
+        if len(self.order) == self.order.maxlen:
+            self.signatures.discard(self.order.popleft())
+        self.order.append(signature)
+        self.signatures.add(signature)
+
+def del_dup_validators(table):
+    '''
+    Remove validators whose master or ephemeral key is already being tracked.
+
+    :param list table: Rows for each validator being tracked
 
-    :rtype: (list, list)
+    :return: Master and ephemeral keys for the remaining validators
+    :return: Validator table without duplicates
+    :rtype: (set, list)
     '''
-    val_keys = []
+    val_keys = set()
     table_new = []
 
     for validator in table:
-        if validator.get('master_key') not in val_keys:
-            val_keys.append(validator.get('master_key'))
+        keys = {validator.master_key, validator.validation_public_key}
+        keys.discard(None)
+        if val_keys.isdisjoint(keys):
+            val_keys.update(keys)
             table_new.append(validator)
         else:
             logging.warning(f"Removed duplicate validator: '{validator}'.")
@@ -28,27 +60,7 @@ async def del_dup_validators(table):
     logging.info(f"Finished removing duplicate validators. Original table had: '{len(table)}' items. New table has: '{len(table_new)}' items.")
     return val_keys, table_new
 
-async def clean_validations(settings, val_keys, table, processed_validations):
-    '''
-    Ensure the processed_validations list doesn't go on forever.
-
-    If set, ensure the same validator isn't monitored twice.
-
-    :param settings: Config file
-    :param list val_keys: Master or ephemeral validation keys we are monitoring for
-    :param list table: Dictionaries for each validator being tracked
-    :param list processed_validations: Prune this
-    '''
-    if len(processed_validations) >= settings.PROCESSED_VAL_MAX:
-        half_list = settings.PROCESSED_VAL_MAX / 2
-        logging.info(f"Processed validation list >= '{settings.PROCESSED_VAL_MAX}'. Deleting: '{half_list}' items.")
-        del processed_validations[0:int(half_list)]
-
-        if settings.REMOVE_DUP_VALIDATORS:
-            val_keys, table = await del_dup_validators(table)
-    return val_keys, table, processed_validations
-
-async def reset_potentially_omitted_values(validator):
+def reset_potentially_omitted_values(validator):
     '''
     Don't assume that potentially omitted values persist.
     For example, an amendment may be supported by a validator
@@ -56,90 +68,175 @@ async def reset_potentially_omitted_values(validator):
     with the 'amendment' key/value missing. Without this function, it would appear
     that the operator still supports the amendment, despite dropping support.
 
-    :param dict validator: An individual validator's dictionary
+    :param ValidatorRow validator: An individual validator's row
     '''
     message_keys = ['amendments', 'base_fee', 'load_fee', 'reserve_base', 'reserve_inc', 'server_version']
     for i in message_keys:
-        validator[i] = None
+        setattr(validator, i, None)
 
-async def update_table_validator(table, message):
+def index_validators(table):
+    '''
+    Map master and ephemeral keys to the validators using them, so incoming
+    validations can find their table entries without scanning the table.
+
+    :param list table: Rows for each validator being tracked
+
+    :return: Validators keyed by master key
+    :return: Validators keyed by ephemeral validation key
+    :rtype: (dict, dict)
+    '''
+    by_master = {}
+    by_eph = {}
+    for validator in table:
+        if validator.master_key:
+            by_master.setdefault(validator.master_key, []).append(validator)
+        if validator.validation_public_key:
+            by_eph.setdefault(validator.validation_public_key, []).append(validator)
+    logging.info(f"Indexed validator table by '{len(by_master)}' master keys and '{len(by_eph)}' ephemeral keys.")
+    return by_master, by_eph
+
+def clean_validations(settings, table, val_index):
+    '''
+    If set, ensure the same validator isn't monitored twice, then rebuild the
+    validator key set and index from the keys currently in the table.
+
+    :param settings: Configuration file
+    :param list table: Rows for each validator being tracked
+    :param tuple val_index: Validators keyed by master key and by ephemeral key, rebuilt in place
+
+    :return: Master and ephemeral keys for the tracked validators
+    :return: Validator table
+    :rtype: (set, list)
+    '''
+    if settings.REMOVE_DUP_VALIDATORS:
+        val_keys, table = del_dup_validators(table)
+    else:
+        val_keys = set()
+        for validator in table:
+            if validator.master_key:
+                val_keys.add(validator.master_key)
+            if validator.validation_public_key:
+                val_keys.add(validator.validation_public_key)
+
+    for keys, index in zip(val_index, index_validators(table)):
+        keys.clear()
+        keys.update(index)
+    return val_keys, table
+
+def update_table_validator(table, by_master, by_eph, message, now):
     '''
     Update the table based on a received validation message.
 
-    :param list table: Dictionaries for each validator being tracked
+    :param list table: Rows for each validator being tracked
+    :param dict by_master: Validators keyed by master key
+    :param dict by_eph: Validators keyed by ephemeral validation key
     :param dict message: JSON decoded message to add to the table
+    :param float now: Time the message was received
+
+    :return: Updated validator table
+    :return: Whether any validator was updated
+    :return: Whether any validator's master or ephemeral key changed
+    :rtype: (list, bool, bool)
     '''
     message = message['data']
 
     # Consider notifying if the ephemeral/master key or cookie changes for a server
 
-    for validator in table:
-        if message.get('master_key') and message.get('master_key') == validator['master_key'] \
-           or message.get('validation_public_key') == validator['validation_public_key']:
-            # Check if this is a flag ledger.
-            if (int(message['ledger_index']) + 1) % 256 == 0:
-                await reset_potentially_omitted_values(validator)
-            for key in validator.keys():
-                if key in message.keys():
-                    validator[key] = message[key]
-            validator['time_updated'] = time.strftime("%y-%m-%d %H:%M:%S", time.localtime())
+    time_updated = get_time_updated(now)
+
+    # A validator can be tracked by either key, so update every row matching either one
+    validators = {
+        id(validator): validator for validator in (
+            *by_master.get(message.get('master_key'), ()),
+            *by_eph.get(message.get('validation_public_key'), ()),
+        )
+    }.values()
+    keys_changed = False
+    for validator in validators:
+        keys = (validator.master_key, validator.validation_public_key)
+        # Check if this is a flag ledger.
+        if (int(message['ledger_index']) + 1) % 256 == 0:
+            reset_potentially_omitted_values(validator)
+        for key in message.keys() & VALIDATOR_FIELDS:
+            setattr(validator, key, message[key])
+        validator.time_updated = time_updated
+        if keys != (validator.master_key, validator.validation_public_key):
+            keys_changed = True
     logging.info("Successfully updated validator table.")
 
-    return table
+    return table, bool(validators), keys_changed
 
-async def process_validations(settings, val_keys, table_validator, processed_validations, message):
+def process_validations(settings, val_keys, table_validator, val_index, processed_validations, message, now):
     '''
     Process unique validation messages.
     :param settings: Configuration file
-    :param list val_keys: master and ephemeral validation keys to monitor for
-    :param list table_validator: Dictionaries for each validator being tracked
-    :param list processed_validations: Validation messages we already processed (avoid
+    :param set val_keys: master and ephemeral validation keys to monitor for
+    :param list table_validator: Rows for each validator being tracked
+    :param tuple val_index: Validators keyed by master key and by ephemeral key
+    :param SignatureWindow processed_validations: Validation messages we already processed (avoid
     processing duplicate messages)
     :param dict message: JSON decoded message to process
+    :param float now: Time the message was received
+
+    :return: Validator keys, validator table, processed validations, and whether a validator was updated
+    :rtype: (set, list, SignatureWindow, bool)
     '''
     # Update the table
-    logging.info(f"Preparing to update validator table based on message from '{message['server_url']}'.")
-    table_validator = await update_table_validator(table_validator, message)
-    logging.info(f"Updated validator table based on message from '{message['server_url']}'.")
-    # Add the message so we don't process duplicates
-    processed_validations.append(message['data']['signature'])
-    logging.info(f"Appended validation from '{message['server_url']}' to received tracking queue.")
-    # Prune received message queue and remove duplicate validators from tracking (depending on settings)
-    logging.info("Checking to see if we need to clean things")
-    val_keys, table_validator, processed_validations = await clean_validations(
-        settings, val_keys, table_validator, processed_validations
-    )
+    logging.info("Preparing to update validator table based on message from '%s'.", message['server_url'])
+    table_validator, updated, keys_changed = update_table_validator(table_validator, *val_index, message, now)
+    logging.info("Updated validator table based on message from '%s'.", message['server_url'])
+    # A validator tracked by one key may have just reported the other (usually its master
+    # key), which can make it a duplicate of another row and must be indexed under it.
+    if keys_changed:
+        val_keys, table_validator = clean_validations(settings, table_validator, val_index)
+    # Add the message so we don't process duplicates. The window forgets the oldest
+    # signatures on its own once it reaches PROCESSED_VAL_MAX.
+    processed_validations.add(message['data']['signature'])
+    logging.info("Appended validation from '%s' to received tracking queue.", message['server_url'])
 
     logging.info("Done processing validation message.")
-    return val_keys, table_validator, processed_validations
+    return val_keys, table_validator, processed_validations, updated
 
-async def log_validations(settings, message):
+def log_validations(settings, message):
     '''
     Log validations defined in the settings file.
     '''
     if message['data'].get('master_key') in settings.LOG_VALIDATIONS_FROM:
         logging.critical(f"Logged validation: '{message}'.")
 
-async def check_validations(settings, val_keys, table_validator, processed_validations, message):
+async def check_validations(settings, val_keys, table_validator, val_index, processed_validations, message, now):
     '''
     Check to see if we should continue processing validation messages.
 
     :param settings: Configuration file
-    :param list val_keys: master and ephemeral validation keys to monitor for
-    :param list table_validator: Dictionaries for each validator being tracked
-    :param list processed_validations: Validation messages we already processed (avoid
+    :param set val_keys: master and ephemeral validation keys to monitor for
+    :param list table_validator: Rows for each validator being tracked
+    :param tuple val_index: Validators keyed by master key and by ephemeral key
+    :param SignatureWindow processed_validations: Validation messages we already processed (avoid
     processing duplicate messages)
     :param dict message: JSON decoded message to process
+    :param float now: Time the message was received
+
+    :return: Validator keys, validator table, processed validations, and whether a validator was updated
+    :rtype: (set, list, SignatureWindow, bool)
     '''
-    logging.debug(f"New validation message from '{message.get('server_url')}'.")
-    if message['data'].get('master_key') in val_keys or message['data'].get('validation_public_key') in val_keys \
-       and message['data'].get('validation_public_key'):
-        if message['data']['signature'] not in processed_validations:
-            val_keys, table_validator, processed_validations = await process_validations(
-                settings, val_keys, table_validator, processed_validations, message
-            )
-            await log_validations(settings, message)
+    logging.debug("New validation message from '%s'.", message.get('server_url'))
+    # Bind get once, it's used for each of the lookups below
+    get = message['data'].get
+    # Most messages are copies of validations already received from another server, so
+    # check for those first.
+    if get('signature') in processed_validations:
+        logging.debug("Ignored duplicate validation message from: '%s'.", message['server_url'])
+        return val_keys, table_validator, processed_validations, False
+
+    # val_keys never contains None, so messages without a master key can't match on it
+    if not val_keys.isdisjoint((get('master_key'), get('validation_public_key'))):
+        val_keys, table_validator, processed_validations, updated = process_validations(
+            settings, val_keys, table_validator, val_index, processed_validations, message, now
+        )
+        log_validations(settings, message)
     else:
-        logging.debug(f"Ignored validation message from: '{message['server_url']}'.")
+        updated = False
+        logging.debug("Ignored validation message from: '%s'.", message['server_url'])
 
-    return val_keys, table_validator, processed_validations
+    return val_keys, table_validator, processed_validations, updated
@@ -12,8 +12,11 @@ ASYNCIO_DEBUG = False # Verbose logging from asyncio
 WS_RETRY = 20 # number of seconds to wait between dropped WS connection checks
 MAX_CONNECT_ATTEMPTS = 999999 # Max number of connection retries
 
+MAX_MSG_BATCH = 256 # Maximum number of queued messages to process before running periodic tasks
+YIELD_EVERY = 500 # Number of messages to process before letting other asyncio tasks run
+
 PROCESSED_VAL_MAX = 10000 # Maximum number of validation messages to store to avoid duplicates
-# when this number is reached, half of the validation message tracking list will be deleted.
+# when this number is reached, the oldest validation signatures are discarded as new ones arrive.
 
 MAX_VAL_STREAMS = 5 # Max validations streams to subscribe to. These produce a lot of messages.
 # Client too slow WS disconnects, seemingly forked servers, and other unexpected behavior